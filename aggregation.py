@@ -0,0 +1,48 @@
+"""
+Shared aggregation and ranking helpers for the crop rate analysis scripts.
+"""
+
+import importlib.util
+
+import numpy as np
+
+# Only checked for, not imported: pandas loads numba itself the first time
+# group_mean takes the numba path, so scripts that never do skip the import cost
+HAS_NUMBA = importlib.util.find_spec('numba') is not None
+
+# Below this many rows the numba JIT compile costs more than the parallel kernel saves
+NUMBA_MIN_ROWS = 1_000_000
+
+
+def group_mean(df, by, columns):
+    """
+    Per-group means of `columns`, using pandas' parallel numba kernel on large frames.
+    """
+    grouped = df.groupby(by, observed=True, sort=False)[columns]
+    # The numba kernel divides by zero on groups whose values are all NaN
+    if HAS_NUMBA and len(df) >= NUMBA_MIN_ROWS and df[columns].notna().all().all():
+        means = grouped.mean(engine='numba', engine_kwargs={'parallel': True, 'nogil': True})
+    else:
+        means = grouped.mean()
+    return means
+
+
+def top_n_positions(values, n):
+    """
+    Positions of the `n` largest entries of `values`, largest first.
+    Matches DataFrame.nlargest(keep='first'): ties go to the earlier position and
+    NaN entries only fill the tail when there are fewer than `n` numbers. Selection
+    is an O(N) partition rather than a sort of the whole column.
+    """
+    nan_mask = np.isnan(values)
+    valid = np.flatnonzero(~nan_mask)
+    if n <= 0:
+        return valid[:0]
+    if len(valid) > n:
+        kth = len(valid) - n
+        cutoff = np.partition(values[valid], kth)[kth]
+        valid = valid[values[valid] >= cutoff]
+    top = valid[np.argsort(-values[valid], kind='stable')[:n]]
+    if len(top) < n:
+        top = np.concatenate([top, np.flatnonzero(nan_mask)[:n - len(top)]])
+    return top
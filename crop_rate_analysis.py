@@ -1,44 +1,23 @@
-import pandas as pd
-import re
-
-
-def clean_rate(rate_str):
-    """Extract numeric value from rate string like 'Rs. 1700/-'"""
-    if pd.isna(rate_str) or rate_str == '&nbsp;':
-        return None
-    match = re.search(r'(\d+)', str(rate_str))
-    if match:
-        return float(match.group(1))
-    return None
+from aggregation import group_mean
+from data_loader import load_cleaned
 
 
 def analyze_march_crop_rates(file_path):
     """Analyze which crop gives the best rate in March based on historical data."""
     
-    df = pd.read_excel(file_path)
-    
-    # Clean rate columns
-    df['max_rate'] = df['product_max_rate'].apply(clean_rate)
-    df['min_rate'] = df['product_min_rate'].apply(clean_rate)
-    
-    # Calculate average rate
-    df['avg_rate'] = (df['max_rate'] + df['min_rate']) / 2
-    
-    # Extract month
-    df['month'] = df['rate_date'].dt.month
+    df = load_cleaned(file_path)
     
     # Filter for March (month = 3)
-    march_data = df[df['month'] == 3].copy()
+    march_data = df[df['month'] == 3]
     
-    # Group by product and calculate average rates
-    march_summary = march_data.groupby('product_name').agg({
-        'max_rate': 'mean',
-        'min_rate': 'mean',
-        'avg_rate': 'mean'
-    }).round(2)
+    # Group by product and calculate average rates; the overall average follows
+    # from the max/min means, so only two columns go through the groupby
+    march_summary = group_mean(march_data, 'product_name', ['max_rate', 'min_rate'])
+    march_summary['avg_rate'] = (march_summary['max_rate'] + march_summary['min_rate']) / 2
+    march_summary = march_summary.round(2)
     
     # Sort by average rate descending
-    march_summary = march_summary.sort_values('avg_rate', ascending=False)
+    march_summary = march_summary.sort_values(['avg_rate', 'product_name'], ascending=[False, True])
     
     # Rename columns for clarity
     march_summary.columns = ['Avg Max Rate (Rs)', 'Avg Min Rate (Rs)', 'Average Rate (Rs)']
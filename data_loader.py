@@ -0,0 +1,151 @@
+"""
+Shared data loading for the crop rate analysis scripts.
+Caches the parsed Excel sheet as Parquet so repeat runs skip the slow Excel parse,
+and builds the cleaned master frame that every analysis filters.
+"""
+
+import os
+import re
+import zlib
+from functools import lru_cache
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import python_calamine  # noqa: F401
+    # Rust xlsx reader, several times faster than walking the XML with openpyxl
+    EXCEL_READER_ENGINE = 'calamine'
+except ImportError:
+    EXCEL_READER_ENGINE = 'openpyxl'
+
+try:
+    import xlsxwriter  # noqa: F401
+    # Writes worksheet XML without openpyxl's per-cell Python objects
+    EXCEL_WRITER_ENGINE = 'xlsxwriter'
+except ImportError:
+    EXCEL_WRITER_ENGINE = 'openpyxl'
+
+# Currency prefix, '/-' suffix and thousands separators around the number in 'Rs. 1,700/-'
+RATE_TOKENS = re.compile(r'Rs\.|/-|,')
+
+# Only the columns the analyses use; rate and quantity cells mix numbers with '&nbsp;'
+COLUMNS = [
+    'rate_date', 'code_number', 'product_name',
+    'product_quantity', 'product_max_rate', 'product_min_rate',
+]
+DTYPES = {
+    'product_name': 'string',
+    'product_quantity': 'string',
+    'product_max_rate': 'string',
+    'product_min_rate': 'string',
+}
+
+# Part of the cache file name, so a copy written with other columns or dtypes is never reused
+CACHE_TAG = format(zlib.crc32(repr((COLUMNS, sorted(DTYPES.items()))).encode()), '08x')
+
+
+def _cache_path(path):
+    return f'{os.path.splitext(path)[0]}.{CACHE_TAG}.parquet'
+
+
+def _cache_is_fresh(path):
+    cache = _cache_path(path)
+    return os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path)
+
+
+def cached_load(path):
+    """Load the Excel file at `path`, reusing its Parquet copy while that is newer than the source."""
+    if HAS_PYARROW and _cache_is_fresh(path):
+        return pd.read_parquet(_cache_path(path), engine='pyarrow')
+
+    df = pd.read_excel(
+        path, engine=EXCEL_READER_ENGINE,
+        usecols=COLUMNS, dtype=DTYPES, parse_dates=['rate_date'],
+    )
+
+    df['rate_date'] = ensure_datetime(df['rate_date'])
+
+    if HAS_PYARROW:
+        # The cache is only a speed-up; a read-only data directory just means no cache
+        try:
+            df.to_parquet(_cache_path(path), engine='pyarrow', compression='zstd')
+        except OSError:
+            pass
+    return df
+
+
+def ensure_datetime(values):
+    """
+    `values` as datetimes. Excel date cells arrive as datetimes already; text dates
+    get one vectorised ISO-8601 parse. Blank cells become NaT, but any other date
+    format raises ValueError rather than silently dropping those rows later.
+    """
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, format='ISO8601', cache=True)
+
+
+def parquet_cache(path):
+    """
+    Path of an up-to-date Parquet copy of the Excel file at `path`, parsing the
+    workbook first if the copy is missing or stale; None without pyarrow or when
+    the copy cannot be written. For readers like polars that scan the columnar file directly.
+    """
+    if not HAS_PYARROW:
+        return None
+    if not _cache_is_fresh(path):
+        cached_load(path)
+    return _cache_path(path) if _cache_is_fresh(path) else None
+
+
+def parse_rate(rates):
+    """
+    Convert a column of rate strings like 'Rs. 1700/-' to float64; unparseable cells
+    become NaN. A float32 column was tried and dropped: each rate fits exactly, but
+    the per-month means do not, and those means feed the revenue figures.
+    """
+    cleaned = rates.astype('string').str.replace(RATE_TOKENS, '', regex=True).str.strip()
+    return pd.to_numeric(cleaned, errors='coerce').astype('float64')
+
+
+@lru_cache(maxsize=None)
+def load_cleaned(path):
+    """
+    Load `path` once per process with numeric rates, calendar month and the
+    vegetable flag (code_number starting with '2') already computed.
+    The frame is shared between callers, so analyses must filter it, not modify it.
+    """
+    df = cached_load(path)
+
+    # Integer category codes let the groupby('product_name') calls skip string hashing
+    df['product_name'] = df['product_name'].astype('category')
+
+    df['max_rate'] = parse_rate(df['product_max_rate'])
+    df['min_rate'] = parse_rate(df['product_min_rate'])
+    df['avg_rate'] = (df['max_rate'] + df['min_rate']) / 2
+
+    # 1-12 fits in int8, an eighth of the bytes for every `month == m` scan
+    month = df['rate_date'].dt.month
+    df['month'] = month.astype('int8') if month.notna().all() else month
+    df['year'] = df['rate_date'].dt.year
+
+    df['is_veg'] = starts_with_two(df['code_number'])
+    return df
+
+
+def starts_with_two(codes):
+    """True where the code's leading digit is 2, e.g. 2001-2999 for four-digit codes"""
+    if pd.api.types.is_integer_dtype(codes) and len(codes) and codes.min() > 0:
+        cn = codes.to_numpy()
+        width = len(str(cn.min()))
+        # A plain range compare is only valid when every code has the same digit width
+        if len(str(cn.max())) == width:
+            lo = 2 * 10 ** (width - 1)
+            return pd.Series((cn >= lo) & (cn < lo + 10 ** (width - 1)), index=codes.index)
+    return codes.astype('string[pyarrow]' if HAS_PYARROW else 'string').str.startswith('2')
@@ -1,6 +1,9 @@
 import pandas as pd
 import numpy as np
 
+from aggregation import group_mean, top_n_positions
+from data_loader import EXCEL_WRITER_ENGINE, load_cleaned
+
 # Average yield per acre in quintals for common vegetables (Indian agricultural data)
 YIELD_PER_ACRE = {
     'भेंडी': 40,        # Okra/Bhindi
@@ -51,48 +54,30 @@ YIELD_PER_ACRE = {
 DEFAULT_YIELD = 50  # Default yield for unknown vegetables
 
 
-def extract_rate(rate_str):
-    """Extract numeric value from rate string like 'Rs. 1700/-'"""
-    if pd.isna(rate_str):
-        return np.nan
-    rate_str = str(rate_str)
-    cleaned = rate_str.replace('Rs.', '').replace('/-', '').replace(',', '').strip()
-    try:
-        return float(cleaned)
-    except ValueError:
-        return np.nan
-
-
 def load_and_prepare_data(filepath):
     """Load excel data and prepare vegetable records"""
-    df = pd.read_excel(filepath)
-    df['rate_date'] = pd.to_datetime(df['rate_date'])
+    df = load_cleaned(filepath)
     
     # Filter vegetables (code_number starting with '2')
-    veg_df = df[df['code_number'].astype(str).str.startswith('2')].copy()
-    
-    # Extract numeric rates
-    veg_df['max_rate'] = veg_df['product_max_rate'].apply(extract_rate)
-    veg_df['min_rate'] = veg_df['product_min_rate'].apply(extract_rate)
-    veg_df['avg_rate'] = (veg_df['max_rate'] + veg_df['min_rate']) / 2
-    
-    # Add month column
-    veg_df['month'] = veg_df['rate_date'].dt.month
-    
-    return veg_df
+    return df[df['is_veg']]
 
 
 def calculate_profitability(veg_df):
     """Calculate profitability score for each vegetable per month"""
     # Aggregate by month and product: mean of average rate
-    monthly_agg = veg_df.groupby(['month', 'product_name']).agg({
-        'avg_rate': 'mean',
-        'max_rate': 'mean',
-        'min_rate': 'mean'
-    }).reset_index()
+    monthly_agg = group_mean(
+        veg_df, ['month', 'product_name'], ['avg_rate', 'max_rate', 'min_rate']
+    ).reset_index()
     
-    # Add yield per acre
-    monthly_agg['yield_per_acre'] = monthly_agg['product_name'].map(YIELD_PER_ACRE).fillna(DEFAULT_YIELD)
+    # Add yield per acre: look each category up once, then gather by category code.
+    # load_cleaned's names are categorical already; other frames are cast here, on
+    # the small aggregated frame
+    names = monthly_agg['product_name'].astype('category').cat
+    yield_table = np.fromiter(
+        (YIELD_PER_ACRE.get(name, DEFAULT_YIELD) for name in names.categories),
+        dtype=np.float32, count=len(names.categories)
+    )
+    monthly_agg['yield_per_acre'] = yield_table[names.codes.to_numpy()]
     
     # Calculate estimated revenue per acre (rate is per quintal)
     monthly_agg['revenue_per_acre'] = monthly_agg['avg_rate'] * monthly_agg['yield_per_acre']
@@ -109,9 +94,17 @@ def get_top_vegetables_by_month(profitability_df, top_n=5):
         9: 'September', 10: 'October', 11: 'November', 12: 'December'
     }
     
-    for month in sorted(profitability_df['month'].unique()):
-        month_data = profitability_df[profitability_df['month'] == month]
-        top_veg = month_data.nlargest(top_n, 'revenue_per_acre')[
+    # Sort once by month and slice each month's contiguous block instead of re-masking the frame
+    by_month = profitability_df.sort_values('month', kind='stable')
+    months = by_month['month'].to_numpy()
+    present = np.unique(months)
+    starts = np.searchsorted(months, present, side='left')
+    ends = np.searchsorted(months, present, side='right')
+    
+    for month, start, end in zip(present, starts, ends):
+        month_data = by_month.iloc[start:end]
+        top_rows = top_n_positions(month_data['revenue_per_acre'].to_numpy(), top_n)
+        top_veg = month_data.iloc[top_rows][
             ['product_name', 'avg_rate', 'yield_per_acre', 'revenue_per_acre']
         ].reset_index(drop=True)
         top_veg.index = range(1, len(top_veg) + 1)
@@ -132,40 +125,45 @@ def print_results(results):
         print(f"{'Rank':<6}{'Vegetable':<15}{'Avg Rate (Rs/Q)':<18}{'Yield (Q/Acre)':<16}{'Revenue (Rs/Acre)':<18}")
         print("-" * 80)
         
-        for rank, row in df.iterrows():
-            print(f"{rank:<6}{row['product_name']:<15}{row['avg_rate']:>14,.0f}{row['yield_per_acre']:>14.0f}{row['revenue_per_acre']:>18,.0f}")
+        # Format whole columns and print the block at once instead of walking iterrows
+        if not df.empty:
+            lines = (
+                df.index.to_series().map('{:<6}'.format)
+                + df['product_name'].astype(str).str.ljust(15)
+                + df['avg_rate'].map('{:>14,.0f}'.format)
+                + df['yield_per_acre'].map('{:>14.0f}'.format)
+                + df['revenue_per_acre'].map('{:>18,.0f}'.format)
+            )
+            print('\n'.join(lines))
 
 
 def export_to_excel(results, output_path):
     """Export results to Excel file"""
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+    columns = ['product_name', 'avg_rate', 'yield_per_acre', 'revenue_per_acre']
+    
+    with pd.ExcelWriter(output_path, engine=EXCEL_WRITER_ENGINE) as writer:
         # Summary sheet with top vegetable per month
-        summary_data = []
-        for month_name, df in results.items():
-            if not df.empty:
-                top = df.iloc[0]
-                summary_data.append({
-                    'Month': month_name,
-                    'Top Vegetable': top['product_name'],
-                    'Avg Rate (Rs/Quintal)': top['avg_rate'],
-                    'Yield (Quintals/Acre)': top['yield_per_acre'],
-                    'Revenue (Rs/Acre)': top['revenue_per_acre']
-                })
-        
-        summary_df = pd.DataFrame(summary_data)
+        summary_rows = [
+            (month_name, *df[columns].iloc[0])
+            for month_name, df in results.items()
+            if not df.empty
+        ]
+        summary_df = pd.DataFrame.from_records(summary_rows, columns=[
+            'Month', 'Top Vegetable', 'Avg Rate (Rs/Quintal)',
+            'Yield (Quintals/Acre)', 'Revenue (Rs/Acre)'
+        ])
         summary_df.to_excel(writer, sheet_name='Summary', index=False)
         
-        # Detailed sheet with top 5 per month
-        all_data = []
-        for month_name, df in results.items():
-            df_copy = df.copy()
-            df_copy.insert(0, 'Month', month_name)
-            df_copy.insert(1, 'Rank', range(1, len(df_copy) + 1))
-            all_data.append(df_copy)
-        
-        detailed_df = pd.concat(all_data, ignore_index=True)
-        detailed_df.columns = ['Month', 'Rank', 'Vegetable', 'Avg Rate (Rs/Quintal)', 
-                               'Yield (Quintals/Acre)', 'Revenue (Rs/Acre)']
+        # Detailed sheet with top 5 per month, collected as plain tuples and built once
+        detailed_rows = [
+            (month_name, rank, *row)
+            for month_name, df in results.items()
+            for rank, row in enumerate(df[columns].itertuples(index=False, name=None), 1)
+        ]
+        detailed_df = pd.DataFrame.from_records(detailed_rows, columns=[
+            'Month', 'Rank', 'Vegetable', 'Avg Rate (Rs/Quintal)',
+            'Yield (Quintals/Acre)', 'Revenue (Rs/Acre)'
+        ])
         detailed_df.to_excel(writer, sheet_name='Detailed', index=False)
     
     print(f"\nResults exported to: {output_path}")
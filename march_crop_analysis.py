@@ -3,57 +3,41 @@ Crop Rate Analysis for March
 Analyzes historical data to determine which crops give the best rates in March.
 """
 
-import pandas as pd
-import re
-
-
-def extract_rate(rate_string):
-    """Extract numeric rate value from string like 'Rs. 1700/-'"""
-    if pd.isna(rate_string):
-        return None
-    match = re.search(r'(\d+)', str(rate_string))
-    return int(match.group(1)) if match else None
+from data_loader import load_cleaned
 
 
 def load_and_prepare_data(filepath):
     """Load Excel data and prepare for analysis."""
-    df = pd.read_excel(filepath)
-    
-    # Extract numeric rates
-    df['max_rate'] = df['product_max_rate'].apply(extract_rate)
-    df['min_rate'] = df['product_min_rate'].apply(extract_rate)
-    
-    # Calculate average rate
-    df['avg_rate'] = (df['max_rate'] + df['min_rate']) / 2
-    
-    # Extract month
-    df['month'] = df['rate_date'].dt.month
-    df['year'] = df['rate_date'].dt.year
-    
-    return df
+    return load_cleaned(filepath)
 
 
 def analyze_march_rates(df):
     """Analyze crop rates for March."""
-    march_data = df[df['month'] == 3].copy()
+    march_data = df[df['month'] == 3]
     
     # Aggregate by crop
-    crop_stats = march_data.groupby('product_name').agg({
+    crop_stats = march_data.groupby('product_name', observed=True, sort=False).agg({
         'max_rate': ['mean', 'max', 'min', 'std'],
         'min_rate': ['mean', 'max', 'min'],
-        'avg_rate': 'mean',
         'rate_date': 'count'
-    }).round(2)
+    })
     
     # Flatten column names
     crop_stats.columns = [
         'avg_max_rate', 'highest_max_rate', 'lowest_max_rate', 'max_rate_std',
         'avg_min_rate', 'highest_min_rate', 'lowest_min_rate',
-        'avg_rate', 'record_count'
+        'record_count'
     ]
     
+    # Average rate follows from the max/min means instead of a third aggregated column
+    crop_stats.insert(
+        len(crop_stats.columns) - 1, 'avg_rate',
+        (crop_stats['avg_max_rate'] + crop_stats['avg_min_rate']) / 2
+    )
+    crop_stats = crop_stats.round(2)
+    
     # Sort by average rate (descending)
-    crop_stats = crop_stats.sort_values('avg_rate', ascending=False)
+    crop_stats = crop_stats.sort_values(['avg_rate', 'product_name'], ascending=[False, True])
     
     return crop_stats, march_data
 
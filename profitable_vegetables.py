@@ -37,54 +37,44 @@ Outputs
 
 import pandas as pd
 import numpy as np
-from openpyxl import load_workbook
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 
+from data_loader import cached_load, parse_rate
+
 # ──────────────────────────────────────────────
 # 1.  LOAD  &  FILTER  –  keep only vegetables
 # ──────────────────────────────────────────────
 INPUT_FILE  = "product_all.xlsx"
 OUTPUT_FILE = "profitable_vegetables.xlsx"
 
-VEGETABLE_CODES = list(range(1001, 1005)) + list(range(2001, 2044))
-
-df = pd.read_excel(
-    INPUT_FILE,
-    sheet_name=0,
-    header=0,
-    usecols=[
-        "rate_date", "code_number", "product_name",
-        "product_quantity", "product_max_rate", "product_min_rate",
-    ],
-)
+# Parsed once from Excel, then reused from a Parquet copy next to the source
+# (see data_loader.cached_load); the rate and quantity columns arrive as text.
+df = cached_load(INPUT_FILE)
 
-df = df[df["code_number"].isin(VEGETABLE_CODES)].copy()
+# Vegetable codes are two contiguous ranges, 1001-1004 and 2001-2043, so the
+# filter is two range compares instead of a hash-set lookup per row.  The
+# compares run on the raw column, where a blank code is NaN and simply fails
+# them; only the kept rows, all valid codes, are narrowed to int32.
+codes = df["code_number"]
+df = df.loc[codes.between(1001, 1004) | codes.between(2001, 2043)].copy()
+df["code_number"] = df["code_number"].astype("int32")
 
 # ──────────────────────────────────────────────
-# 2.  CLEAN  –  drop &nbsp; placeholders, parse
-#              "Rs. 1700/-" strings → float
+# 2.  CLEAN  –  parse "Rs. 1700/-" strings → float;
+#              &nbsp; placeholders parse to NaN and are dropped
 # ──────────────────────────────────────────────
-df = df[df["product_quantity"].astype(str).str.strip() != "&nbsp;"].copy()
-
-
-def _parse_rs(value: str) -> float:
-    """'Rs. 1700/-'  →  1700.0"""
-    cleaned = str(value).replace("Rs.", "").replace("/-", "").replace(",", "").strip()
-    try:
-        return float(cleaned)
-    except ValueError:
-        return np.nan
-
-
-df["qty"]       = pd.to_numeric(df["product_quantity"], errors="coerce")
-df["max_rate"]  = df["product_max_rate"].apply(_parse_rs)
-df["min_rate"]  = df["product_min_rate"].apply(_parse_rs)
+# "Rs. 1700/-"  →  1700.0, one vectorised string pass per column (float64,
+# see data_loader.parse_rate).
+df["qty"]       = pd.to_numeric(df["product_quantity"], errors="coerce").astype("float64")
+df["max_rate"]  = parse_rate(df["product_max_rate"])
+df["min_rate"]  = parse_rate(df["product_min_rate"])
 df["avg_rate"]  = (df["max_rate"] + df["min_rate"]) / 2.0
 
 df.dropna(subset=["qty", "max_rate", "min_rate"], inplace=True)
 
-df["rate_date"]  = pd.to_datetime(df["rate_date"])
 df["year_month"] = df["rate_date"].dt.to_period("M")
 
 # ──────────────────────────────────────────────
@@ -100,45 +90,59 @@ monthly = (
     .reset_index()
 )
 
+# ≤47 vegetable names repeated across every month: integer category codes make
+# the later sorts, pivots and groupbys compare ints instead of strings
+monthly["product_name"] = monthly["product_name"].astype("category")
+
 # Per-Acre Production proxy  =  total volume  /  trading days
 monthly["per_acre"] = monthly["total_volume"] / monthly["n_days"]
 
 # ──────────────────────────────────────────────
 # 4.  MIN-MAX NORMALISE  (per-month)  &  SCORE
 # ──────────────────────────────────────────────
-def _minmax(series: pd.Series) -> pd.Series:
-    lo, hi = series.min(), series.max()
-    return (series - lo) / (hi - lo) if hi != lo else pd.Series(0.0, index=series.index)
+# month of each row as 0..k-1, so per-month min/max are plain numpy reductions
+month_codes, month_keys = pd.factorize(monthly["year_month"])
 
 
-scored_frames = []
+def _minmax(col: str) -> np.ndarray:
+    """Scale `col` to [0, 1] within each month; 0.0 where a month has no spread."""
+    values = monthly[col].to_numpy(dtype=np.float64)
+    lo = np.full(len(month_keys), np.inf)
+    hi = np.full(len(month_keys), -np.inf)
+    np.fmin.at(lo, month_codes, values)          # fmin/fmax skip NaN like pandas' min/max
+    np.fmax.at(hi, month_codes, values)
+    lo, span = lo[month_codes], (hi - lo)[month_codes]
+    scaled = np.divide(values - lo, span, out=np.zeros_like(values), where=span > 0)
+    return np.nan_to_num(scaled, nan=0.0, copy=False)
 
-for _, month_df in monthly.groupby("year_month"):
-    s = month_df.copy()
-    s["norm_price"]    = _minmax(s["avg_price"]).values
-    s["norm_volume"]   = _minmax(s["total_volume"]).values
-    s["norm_per_acre"] = _minmax(s["per_acre"]).values
 
-    # Equal weight  →  simple average of the three normalised scores
-    s["profit_score"] = (
-        s["norm_price"] + s["norm_volume"] + s["norm_per_acre"]
-    ) / 3.0
+monthly["norm_price"]    = _minmax("avg_price")
+monthly["norm_volume"]   = _minmax("total_volume")
+monthly["norm_per_acre"] = _minmax("per_acre")
 
-    scored_frames.append(s)
+# Equal weight  →  simple average of the three normalised scores
+monthly["profit_score"] = (
+    monthly["norm_price"] + monthly["norm_volume"] + monthly["norm_per_acre"]
+) / 3.0
 
-scored = pd.concat(scored_frames, ignore_index=True)
-scored["year_month_str"] = scored["year_month"].astype(str)
+scored = monthly
+scored["year_month_str"] = scored["year_month"].astype(str).astype("category")
 
 # ──────────────────────────────────────────────
 # 5.  TOP-10 TABLE  per month
 # ──────────────────────────────────────────────
-top10_rows = []
-for ym in sorted(scored["year_month"].unique()):
-    subset = scored[scored["year_month"] == ym].nlargest(10, "profit_score").copy()
-    subset["rank"] = range(1, len(subset) + 1)
-    top10_rows.append(subset)
+# One sort puts every month's rows in profit order; head(10) then keeps each
+# month's leaders, exactly what nlargest(10) returned month by month.
+top10 = (
+    scored.sort_values(["year_month", "profit_score"], ascending=[True, False])
+    .groupby("year_month", sort=False)
+    .head(10)
+    .reset_index(drop=True)
+)
+top10["rank"] = top10.groupby("year_month", sort=False).cumcount() + 1
 
-top10 = pd.concat(top10_rows, ignore_index=True)
+# month → its top-10 slice, shared by the console and Excel writers
+top10_by_month = dict(list(top10.groupby("year_month", sort=True)))
 
 # ──────────────────────────────────────────────
 # 6.  CONSOLE OUTPUT
@@ -182,11 +186,8 @@ DISPLAY_COLS = [
     "norm_price", "norm_volume", "norm_per_acre", "profit_score",
 ]
 
-for ym in sorted(scored["year_month"].unique()):
-    subset = (
-        scored[scored["year_month"] == ym]
-        .nlargest(10, "profit_score")[DISPLAY_COLS]
-    )
+for ym, month_top10 in top10_by_month.items():
+    subset = month_top10[DISPLAY_COLS]
     print(f"\n{'─'*88}")
     print(f"  {ym}  –  Top 10 Most Profitable Vegetables")
     print(f"{'─'*88}")
@@ -216,6 +217,8 @@ RANK_FILLS = {
 }
 WHITE_FONT = Font(name="Calibri", size=10, bold=False, color="FFFFFF")
 BOLD_WHITE = Font(name="Calibri", size=10, bold=True,  color="FFFFFF")
+# (fill, font) per rank, indexed by rank - 1; the podium ranks 1-3 are bold
+RANK_STYLE = [(RANK_FILLS[r], BOLD_WHITE if r <= 3 else WHITE_FONT) for r in range(1, 11)]
 HEADER_FILL = PatternFill("solid", fgColor="2F4F4F")   # dark slate grey
 HEADER_FONT = Font(name="Calibri", size=10, bold=True,  color="FFFFFF")
 MONTH_FILL  = PatternFill("solid", fgColor="1B3A4B")
@@ -227,6 +230,16 @@ THIN_BORDER = Border(
     bottom=Side(style="thin", color="B0B0B0"),
 )
 
+# shared body styles – openpyxl dedupes styles on save, so one instance per
+# distinct look is enough and nothing is rebuilt per cell
+BODY_FONT      = Font(name="Calibri", size=10)
+SMALL_FONT     = Font(name="Calibri", size=9)
+ALIGN_HEADER   = Alignment(horizontal="center", vertical="center", wrap_text=True)
+ALIGN_CENTER   = Alignment(horizontal="center", vertical="center")
+ALIGN_LEFT     = Alignment(horizontal="left",   vertical="center")
+ALIGN_H_CENTER = Alignment(horizontal="center")
+ALIGN_H_LEFT   = Alignment(horizontal="left")
+
 # column headers that go into Sheet-1
 TOP10_HEADERS = [
     "Rank",
@@ -239,26 +252,53 @@ TOP10_HEADERS = [
     "Norm Per-Acre",
     "Profit Score",
 ]
+# scored/top10 columns behind each of those headers, in the same order
+TOP10_COLS = [
+    "rank", "product_name", "avg_price", "total_volume", "per_acre",
+    "norm_price", "norm_volume", "norm_per_acre", "profit_score",
+]
 TOP10_COL_WIDTHS = [6, 22, 14, 15, 14, 12, 12, 14, 13]
+# (alignment, number format) per column: vegetable name left-aligned,
+# everything else centred; None keeps the General format
+TOP10_COL_STYLES = [
+    (ALIGN_CENTER, None),          # rank
+    (ALIGN_LEFT,   None),          # vegetable name
+    (ALIGN_CENTER, "#,##0.00"),    # price
+    (ALIGN_CENTER, "#,##0"),       # volume
+    (ALIGN_CENTER, "#,##0.00"),    # per-acre
+    (ALIGN_CENTER, "0.0000"),      # normalised / score
+    (ALIGN_CENTER, "0.0000"),
+    (ALIGN_CENTER, "0.0000"),
+    (ALIGN_CENTER, "0.0000"),
+]
 
 
-def _style_header_row(ws, row_idx: int, n_cols: int):
-    for c in range(1, n_cols + 1):
-        cell = ws.cell(row=row_idx, column=c)
+def _header_cells(ws, headers) -> list:
+    cells = []
+    for h in headers:
+        cell = WriteOnlyCell(ws, value=h)
         cell.font  = HEADER_FONT
         cell.fill  = HEADER_FILL
-        cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
+        cell.alignment = ALIGN_HEADER
         cell.border = THIN_BORDER
+        cells.append(cell)
+    return cells
 
 
-def _style_month_row(ws, row_idx: int, n_cols: int):
+def _month_cells(ws, label: str, n_cols: int) -> list:
+    cells = []
     for c in range(1, n_cols + 1):
-        cell = ws.cell(row=row_idx, column=c)
+        cell = WriteOnlyCell(ws, value=label if c == 1 else None)
         cell.font  = MONTH_FONT
         cell.fill  = MONTH_FILL
-        cell.alignment = Alignment(horizontal="left", vertical="center")
+        cell.alignment = ALIGN_LEFT
         cell.border = THIN_BORDER
+        cells.append(cell)
+    return cells
+
 
+# The workbook is write-only: rows stream straight to disk in order, so column
+# widths, row heights and freeze panes must be set before the rows they affect.
 
 # ── Sheet 1: "Top 10 Per Month" ──────────────
 def write_top10_sheet(ws):
@@ -267,69 +307,55 @@ def write_top10_sheet(ws):
     for i, w in enumerate(TOP10_COL_WIDTHS, 1):
         ws.column_dimensions[get_column_letter(i)].width = w
 
+    # freeze panes: keep header visible while scrolling
+    ws.freeze_panes = "A2"
+
     # global header row  (row 1)
-    for i, h in enumerate(TOP10_HEADERS, 1):
-        ws.cell(row=1, column=i, value=h)
-    _style_header_row(ws, 1, n_cols)
     ws.row_dimensions[1].height = 22
+    ws.append(_header_cells(ws, TOP10_HEADERS))
 
     current_row = 2
 
-    for ym in sorted(top10["year_month"].unique()):
+    for ym, month_data in top10_by_month.items():
         # ── month banner row ──
         month_label = f"  {ym.strftime('%B %Y')}  –  Top 10 Most Profitable Vegetables"
-        ws.cell(row=current_row, column=1, value=month_label)
-        _style_month_row(ws, current_row, n_cols)
         ws.row_dimensions[current_row].height = 20
+        ws.append(_month_cells(ws, month_label, n_cols))
         current_row += 1
 
         # ── data rows (rank 1-10) ──
-        month_data = (
-            top10[top10["year_month"] == ym]
-            .nlargest(10, "profit_score")
-            .reset_index(drop=True)
-        )
-
-        for idx, row in month_data.iterrows():
-            rank = idx + 1
+        rows = month_data[TOP10_COLS].itertuples(index=False, name=None)
+        for rank, name, price, volume, per_acre, n_price, n_volume, n_acre, score in rows:
             values = [
                 rank,
-                row["product_name"],
-                round(row["avg_price"], 2),
-                int(row["total_volume"]),
-                round(row["per_acre"], 2),
-                round(row["norm_price"], 4),
-                round(row["norm_volume"], 4),
-                round(row["norm_per_acre"], 4),
-                round(row["profit_score"], 4),
+                name,
+                round(price, 2),
+                int(volume),
+                round(per_acre, 2),
+                round(n_price, 4),
+                round(n_volume, 4),
+                round(n_acre, 4),
+                round(score, 4),
             ]
-            fill = RANK_FILLS.get(rank, PatternFill())
-            font = BOLD_WHITE if rank <= 3 else WHITE_FONT
+            fill, font = RANK_STYLE[rank - 1]
 
-            for col_idx, val in enumerate(values, 1):
-                cell = ws.cell(row=current_row, column=col_idx, value=val)
+            cells = []
+            for val, (alignment, fmt) in zip(values, TOP10_COL_STYLES):
+                cell = WriteOnlyCell(ws, value=val)
                 cell.fill   = fill
                 cell.font   = font
                 cell.border = THIN_BORDER
-                cell.alignment = Alignment(
-                    horizontal="center" if col_idx != 2 else "left",
-                    vertical="center",
-                )
-                # numeric formats
-                if col_idx in (3, 5):          # price / per-acre
-                    cell.number_format = "#,##0.00"
-                elif col_idx == 4:             # volume
-                    cell.number_format = "#,##0"
-                elif col_idx in (6, 7, 8, 9):  # normalised / score
-                    cell.number_format = "0.0000"
+                cell.alignment = alignment
+                if fmt:
+                    cell.number_format = fmt
+                cells.append(cell)
 
             ws.row_dimensions[current_row].height = 18
+            ws.append(cells)
             current_row += 1
 
-        current_row += 1          # blank row between months
-
-    # freeze panes: keep header visible while scrolling
-    ws.freeze_panes = ws.cell(row=2, column=1)
+        ws.append([])             # blank row between months
+        current_row += 1
 
 
 # ── Sheet 2: "Full Scores" ───────────────────
@@ -349,29 +375,31 @@ def write_full_sheet(ws):
     for i, w in enumerate(widths, 1):
         ws.column_dimensions[get_column_letter(i)].width = w
 
+    ws.freeze_panes = "A2"
+
     # header
-    for i, h in enumerate(headers, 1):
-        ws.cell(row=1, column=i, value=h)
-    _style_header_row(ws, 1, len(headers))
+    ws.append(_header_cells(ws, headers))
 
     # data – sorted by month then profit_score descending
     export = scored.sort_values(["year_month_str", "profit_score"], ascending=[True, False])
 
-    for r_idx, (_, row) in enumerate(export.iterrows(), start=2):
-        vals = [row[c] for c in cols]
-        for c_idx, val in enumerate(vals, 1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=val)
-            cell.border = THIN_BORDER
-            cell.font   = Font(name="Calibri", size=10)
-            cell.alignment = Alignment(horizontal="center" if c_idx != 3 else "left")
-            if c_idx in (4, 7):
-                cell.number_format = "#,##0.00"
-            elif c_idx in (5, 6):
-                cell.number_format = "#,##0"
-            elif c_idx in (8, 9, 10, 11):
-                cell.number_format = "0.0000"
-
-    ws.freeze_panes = ws.cell(row=2, column=1)
+    # per-column (alignment, number format), resolved once for the whole sheet
+    number_fmts = {4: "#,##0.00", 7: "#,##0.00", 5: "#,##0", 6: "#,##0",
+                   8: "0.0000", 9: "0.0000", 10: "0.0000", 11: "0.0000"}
+    col_styles  = [(ALIGN_H_LEFT if c_idx == 3 else ALIGN_H_CENTER, number_fmts.get(c_idx))
+                   for c_idx in range(1, len(cols) + 1)]
+
+    for tup in export[cols].itertuples(index=False, name=None):
+        cells = []
+        for val, (alignment, fmt) in zip(tup, col_styles):
+            cell = WriteOnlyCell(ws, value=val)
+            cell.border    = THIN_BORDER
+            cell.font      = BODY_FONT
+            cell.alignment = alignment
+            if fmt:
+                cell.number_format = fmt
+            cells.append(cell)
+        ws.append(cells)
 
 
 # ── Sheet 3: "Score Breakdown" (pivot tables) ──
@@ -383,8 +411,9 @@ def write_breakdown_sheet(ws):
         ("Profit Score",                "profit_score"),
     ]
 
-    months       = sorted(scored["year_month_str"].unique())
-    veg_names    = sorted(scored["product_name"].unique())
+    # categories come out of astype("category") already sorted
+    months       = list(scored["year_month_str"].cat.categories)
+    veg_names    = list(scored["product_name"].cat.categories)
     n_months     = len(months)
     n_vegs       = len(veg_names)
     n_cols       = n_months + 1          # vegetable-name col + one per month
@@ -395,50 +424,63 @@ def write_breakdown_sheet(ws):
     VEG_COL_FONT      = Font(name="Calibri", size=9, bold=True, color="1B3A4B")
     TITLE_FONT        = Font(name="Calibri", size=12, bold=True, color="1B3A4B")
 
-    current_row = 1
+    # ── one (vegetable × month) grid per metric, built by pandas instead of
+    #    a Python pass over every scored row; the last duplicate wins as before ──
+    unique_cells = scored.drop_duplicates(["product_name", "year_month_str"], keep="last")
+    grids = {
+        metric: unique_cells.pivot(index="product_name", columns="year_month_str", values=metric)
+                            .reindex(index=veg_names, columns=months)
+                            .to_numpy()
+        for _, metric in pivot_specs
+    }
+
+    # ── column widths, set once before any row is streamed ──
+    ws.column_dimensions["A"].width = 22
+    for m_idx in range(2, n_months + 2):
+        ws.column_dimensions[get_column_letter(m_idx)].width = 13
 
     for title, metric in pivot_specs:
         # ── title row ──
-        ws.cell(row=current_row, column=1, value=title)
-        ws.cell(row=current_row, column=1).font = TITLE_FONT
-        current_row += 1
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = TITLE_FONT
+        ws.append([cell])
 
         # ── header row  ["Vegetable", "2024-06", "2024-07", ...] ──
-        ws.cell(row=current_row, column=1, value="Vegetable")
-        ws.cell(row=current_row, column=1).font  = PIVOT_HEADER_FONT
-        ws.cell(row=current_row, column=1).fill  = PIVOT_HEADER_FILL
-        ws.cell(row=current_row, column=1).border = THIN_BORDER
-        ws.column_dimensions["A"].width = 22
-
-        for m_idx, m_label in enumerate(months, 2):
-            cell = ws.cell(row=current_row, column=m_idx, value=m_label)
+        cell = WriteOnlyCell(ws, value="Vegetable")
+        cell.font   = PIVOT_HEADER_FONT
+        cell.fill   = PIVOT_HEADER_FILL
+        cell.border = THIN_BORDER
+        header = [cell]
+
+        for m_label in months:
+            cell = WriteOnlyCell(ws, value=m_label)
             cell.font   = PIVOT_HEADER_FONT
             cell.fill   = PIVOT_HEADER_FILL
             cell.border = THIN_BORDER
-            cell.alignment = Alignment(horizontal="center")
-            ws.column_dimensions[get_column_letter(m_idx)].width = 13
+            cell.alignment = ALIGN_H_CENTER
+            header.append(cell)
 
-        current_row += 1
+        ws.append(header)
 
-        # ── build a quick lookup  (veg_name, month_str) → value ──
-        lookup = {}
-        for _, row in scored.iterrows():
-            lookup[(row["product_name"], row["year_month_str"])] = row[metric]
+        grid = grids[metric]
 
         # ── data rows ──
-        for veg in veg_names:
+        for v_idx, veg in enumerate(veg_names):
             # vegetable-name cell
-            cell = ws.cell(row=current_row, column=1, value=veg)
+            cell = WriteOnlyCell(ws, value=veg)
             cell.font   = VEG_COL_FONT
             cell.fill   = VEG_COL_FILL
             cell.border = THIN_BORDER
+            cells = [cell]
 
-            for m_idx, m_label in enumerate(months, 2):
-                val  = lookup.get((veg, m_label), "")
-                cell = ws.cell(row=current_row, column=m_idx, value=val)
+            for m_idx in range(n_months):
+                val  = grid[v_idx, m_idx]
+                if pd.isna(val):
+                    val = ""
+                cell = WriteOnlyCell(ws, value=val)
                 cell.border = THIN_BORDER
-                cell.font   = Font(name="Calibri", size=9)
-                cell.alignment = Alignment(horizontal="center")
+                cell.font   = SMALL_FONT
+                cell.alignment = ALIGN_H_CENTER
 
                 if val != "":
                     if metric in ("avg_price", "per_acre"):
@@ -447,29 +489,22 @@ def write_breakdown_sheet(ws):
                         cell.number_format = "#,##0"
                     else:                         # profit_score
                         cell.number_format = "0.0000"
+                cells.append(cell)
 
-            current_row += 1
+            ws.append(cells)
 
-        current_row += 2        # two blank rows between pivot tables
+        ws.append([])           # two blank rows between pivot tables
+        ws.append([])
 
 
 # ── assemble workbook ─────────────────────────
-with pd.ExcelWriter(OUTPUT_FILE, engine="openpyxl") as writer:
-    # write empty DataFrames just to create the sheets with the right names
-    pd.DataFrame().to_excel(writer, sheet_name="Top 10 Per Month", index=False)
-    pd.DataFrame().to_excel(writer, sheet_name="Full Scores",      index=False)
-    pd.DataFrame().to_excel(writer, sheet_name="Score Breakdown",  index=False)
-
-wb = load_workbook(OUTPUT_FILE)
-
-# remove auto-created empty sheets if any duplicates exist
-for name in list(wb.sheetnames):
-    if name not in ("Top 10 Per Month", "Full Scores", "Score Breakdown"):
-        del wb[name]
-
-write_top10_sheet(wb["Top 10 Per Month"])
-write_full_sheet(wb["Full Scores"])
-write_breakdown_sheet(wb["Score Breakdown"])
+# write_only streams each sheet's rows to disk instead of holding every Cell
+# in memory, and saves the file in a single pass.
+wb = Workbook(write_only=True)
+
+write_top10_sheet(wb.create_sheet("Top 10 Per Month"))
+write_full_sheet(wb.create_sheet("Full Scores"))
+write_breakdown_sheet(wb.create_sheet("Score Breakdown"))
 
 wb.save(OUTPUT_FILE)
 print(f"\n✅  Excel report saved  →  {OUTPUT_FILE}")
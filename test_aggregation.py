@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+import pandas as pd
+from aggregation import group_mean, top_n_positions
+
+
+class TestTopNPositions(unittest.TestCase):
+    
+    def assertMatchesNlargest(self, values, n):
+        expected = pd.Series(values).nlargest(n, keep='first').index.to_numpy()
+        np.testing.assert_array_equal(top_n_positions(np.asarray(values, dtype=float), n), expected)
+    
+    def test_top_n_positions_breaks_ties_at_cutoff_by_position(self):
+        values = [5.0, 3.0, 7.0, 3.0, 3.0, 1.0]
+        np.testing.assert_array_equal(top_n_positions(np.array(values), 3), [2, 0, 1])
+        self.assertMatchesNlargest(values, 3)
+    
+    def test_top_n_positions_fills_tail_with_nan(self):
+        values = [np.nan, 2.0, np.nan, 4.0]
+        np.testing.assert_array_equal(top_n_positions(np.array(values), 3), [3, 1, 0])
+        self.assertMatchesNlargest(values, 3)
+    
+    def test_top_n_positions_edge_sizes(self):
+        values = [2.0, np.nan, 9.0, 2.0]
+        self.assertEqual(len(top_n_positions(np.array(values), 0)), 0)
+        for n in (len(values), len(values) + 3):
+            self.assertMatchesNlargest(values, n)
+        self.assertEqual(len(top_n_positions(np.array([]), 5)), 0)
+    
+    def test_top_n_positions_matches_nlargest_on_random_data(self):
+        rng = np.random.default_rng(0)
+        for _ in range(500):
+            size = int(rng.integers(0, 12))
+            values = rng.integers(0, 5, size).astype(float)
+            values[rng.random(size) < 0.2] = np.nan
+            self.assertMatchesNlargest(values, int(rng.integers(0, size + 3)))
+
+
+class TestGroupMean(unittest.TestCase):
+    
+    def test_matches_groupby_mean(self):
+        df = pd.DataFrame({
+            'month': [6, 6, 7, 7, 6],
+            'product_name': pd.Categorical(['A', 'B', 'A', 'A', 'A']),
+            'avg_rate': [10.0, 20.0, np.nan, 30.0, 14.0],
+        })
+        result = group_mean(df, ['month', 'product_name'], ['avg_rate'])
+        expected = df.groupby(['month', 'product_name'], observed=True)[['avg_rate']].mean()
+        pd.testing.assert_frame_equal(result.sort_index(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import data_loader
+from data_loader import (
+    HAS_PYARROW, cached_load, ensure_datetime, parquet_cache, parse_rate, starts_with_two,
+)
+
+
+class TestDataLoaderHelpers(unittest.TestCase):
+    
+    def test_starts_with_two(self):
+        same_width = pd.Series([2001, 1004, 2043, 3001])
+        self.assertEqual(starts_with_two(same_width).tolist(), [True, False, True, False])
+        mixed_width = pd.Series([2001, 205, 1001, 20, 3])
+        self.assertEqual(starts_with_two(mixed_width).tolist(), [True, True, False, True, False])
+        text = pd.Series(['2001', '1001', '25'])
+        self.assertEqual(starts_with_two(text).tolist(), [True, False, True])
+    
+    def test_parse_rate(self):
+        rates = pd.Series(['Rs. 1,700/-', ' Rs. 25/- ', '&nbsp;', None, 'n/a'])
+        parsed = parse_rate(rates)
+        self.assertEqual(parsed.dtype, np.float64)
+        self.assertEqual(parsed.iloc[:2].tolist(), [1700.0, 25.0])
+        self.assertTrue(parsed.iloc[2:].isna().all())
+
+    
+    def test_ensure_datetime_parses_iso_text(self):
+        dates = ensure_datetime(pd.Series(['2024-06-01', '2024-06-02 10:30', None]))
+        self.assertEqual(dates.iloc[:2].tolist(),
+                         [pd.Timestamp('2024-06-01'), pd.Timestamp('2024-06-02 10:30')])
+        self.assertTrue(pd.isna(dates.iloc[2]))
+    
+    def test_ensure_datetime_rejects_other_formats(self):
+        with self.assertRaises(ValueError):
+            ensure_datetime(pd.Series(['2024-06-01', '15/06/2024']))
+
+
+
+@unittest.skipUnless(HAS_PYARROW, 'the Parquet cache needs pyarrow')
+class TestParquetCache(unittest.TestCase):
+    
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.workbook = os.path.join(tmp.name, 'rates.xlsx')
+        self.cache = data_loader._cache_path(self.workbook)
+        self.write_workbook(['Rs. 1700/-', 'Rs. 20/-'])
+    
+    def write_workbook(self, max_rates):
+        pd.DataFrame({
+            'rate_date': pd.to_datetime(['2024-06-01', '2024-06-02']),
+            'code_number': [2001, 1001],
+            'product_name': ['कांदा', 'गहू'],
+            'product_quantity': ['10', '&nbsp;'],
+            'product_max_rate': max_rates,
+            'product_min_rate': ['Rs. 1500/-', '&nbsp;'],
+        }).to_excel(self.workbook, index=False)
+        # Keep the workbook strictly older than any cache written after it
+        os.utime(self.workbook, (1_000_000_000, 1_000_000_000))
+    
+    def test_fresh_cache_is_reused(self):
+        first = cached_load(self.workbook)
+        self.assertTrue(os.path.exists(self.cache))
+        with mock.patch.object(data_loader.pd, 'read_excel', side_effect=AssertionError):
+            pd.testing.assert_frame_equal(cached_load(self.workbook), first)
+    
+    def test_stale_cache_is_rebuilt(self):
+        cached_load(self.workbook)
+        self.write_workbook(['Rs. 1800/-', 'Rs. 20/-'])
+        os.utime(self.cache, (0, 0))
+        self.assertEqual(cached_load(self.workbook)['product_max_rate'].iloc[0], 'Rs. 1800/-')
+        self.assertGreaterEqual(os.path.getmtime(self.cache), os.path.getmtime(self.workbook))
+    
+    def test_cache_with_other_tag_is_ignored(self):
+        other = os.path.splitext(self.workbook)[0] + '.00000000.parquet'
+        pd.DataFrame({'product_name': ['stale']}).to_parquet(other)
+        df = cached_load(self.workbook)
+        self.assertEqual(df['product_name'].tolist(), ['कांदा', 'गहू'])
+        self.assertEqual(list(df.columns), data_loader.COLUMNS)
+        self.assertTrue(os.path.exists(self.cache))
+    
+    def test_unwritable_cache_still_returns_frame(self):
+        # Patched rather than chmod-ed: permission bits do not stop root
+        with mock.patch.object(pd.DataFrame, 'to_parquet', side_effect=PermissionError):
+            df = cached_load(self.workbook)
+            self.assertEqual(len(df), 2)
+            self.assertIsNone(parquet_cache(self.workbook))
+        self.assertFalse(os.path.exists(self.cache))
+    
+    def test_parquet_cache_builds_missing_copy(self):
+        self.assertEqual(parquet_cache(self.workbook), self.cache)
+        self.assertTrue(os.path.exists(self.cache))
+    
+    def test_without_pyarrow_no_cache_is_written(self):
+        with mock.patch.object(data_loader, 'HAS_PYARROW', False):
+            self.assertEqual(len(cached_load(self.workbook)), 2)
+            self.assertIsNone(parquet_cache(self.workbook))
+        self.assertFalse(os.path.exists(self.cache))
+
+
+if __name__ == '__main__':
+    unittest.main()
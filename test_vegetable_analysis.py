@@ -1,11 +1,16 @@
 import unittest
+import numpy as np
 import pandas as pd
 from vegetable_analysis import (
     VegetableAnalysisServiceBuilder,
     MarathiVegetableFilter,
     PerAcreProductionProvider,
     VegetableDataCleaner,
-    PriceRankingStrategy
+    VegetableAggregator,
+    Top5VegetableAnalyzer,
+    RankingCriteria,
+    PriceRankingStrategy,
+    month_label
 )
 
 
@@ -41,6 +46,38 @@ class TestVegetableAnalysis(unittest.TestCase):
         result = strategy.rank(df, 2)
         self.assertEqual(len(result), 2)
         self.assertEqual(result.iloc[0]['avg_price'], 200)
+    
+    def test_top5_by_month_matches_groupby_nlargest(self):
+        aggregated = pd.DataFrame({
+            'month': [202407, 202406, 202407, 202406, 202406, 202407, 202501, 202406, 202407],
+            'product_name': list('ABCDEFGHI'),
+            'avg_price': [10.0, 30.0, 10.0, 20.0, 30.0, np.nan, 5.0, 20.0, 40.0],
+            'total_quantity': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0],
+            'per_acre_production': [np.nan] * 9,
+        })
+        analyzer = Top5VegetableAnalyzer(
+            VegetableAggregator(MarathiVegetableFilter(), PerAcreProductionProvider()))
+        positions = analyzer.top5_positions(aggregated, RankingCriteria.PRICE, n=2)
+        self.assertEqual([month for month, _ in positions], ['2024-07', '2024-06', '2025-01'])
+        
+        expected = aggregated.groupby('month', sort=False)['avg_price'].nlargest(2)
+        for month, rows in positions:
+            key = int(month.replace('-', ''))
+            np.testing.assert_array_equal(rows, expected.loc[key].index.to_numpy())
+        
+        top = analyzer.top5_by_month(aggregated, RankingCriteria.PRICE, n=2)
+        self.assertEqual(top['2024-06']['product_name'].tolist(), ['B', 'E'])
+        self.assertEqual(top['2024-07']['product_name'].tolist(), ['I', 'A'])
+    
+    def test_month_keys_and_labels_match_periods(self):
+        dates = pd.Series(pd.to_datetime([
+            '2024-01-01 00:00', '2024-01-31 23:59', '2024-12-01 00:00', '2024-12-31 23:59',
+            '2025-01-01 00:00', '1969-12-31 12:00', '1970-01-01 00:00',
+        ]))
+        keys = VegetableDataCleaner._month_keys(dates)
+        self.assertEqual(keys.dtype, np.int32)
+        self.assertEqual(keys.tolist(), [202401, 202401, 202412, 202412, 202501, 196912, 197001])
+        self.assertEqual([month_label(k) for k in keys], dates.dt.to_period('M').astype(str).tolist())
 
 
 if __name__ == '__main__':
@@ -6,32 +6,66 @@ Rate and Volume are given equal priority (50% each) using min-max normalization.
 import pandas as pd
 import numpy as np
 
+from aggregation import top_n_positions
+from data_loader import RATE_TOKENS, cached_load, parquet_cache, parse_rate
 
-def extract_rate(rate_str):
-    """Extract numeric rate value from string like 'Rs. 1700/-'"""
-    if pd.isna(rate_str):
-        return np.nan
-    rate_str = str(rate_str)
-    cleaned = rate_str.replace('Rs.', '').replace('/-', '').replace(',', '').strip()
-    try:
-        return float(cleaned)
-    except ValueError:
-        return np.nan
+try:
+    import polars as pl
+    HAS_POLARS = True
+except ImportError:
+    HAS_POLARS = False
 
 
-def normalize(series):
-    """Min-max normalization to scale values between 0 and 1"""
-    min_val = series.min()
-    max_val = series.max()
+def normalize(values):
+    """Min-max normalization of a numpy array to scale values between 0 and 1"""
+    min_val = np.nanmin(values)
+    max_val = np.nanmax(values)
     if max_val == min_val:
-        return pd.Series([0.5] * len(series), index=series.index)
-    return (series - min_val) / (max_val - min_val)
+        return np.full(len(values), 0.5)
+    return (values - min_val) / (max_val - min_val)
 
 
-def main():
-    df = pd.read_excel('product_all.xlsx')
+def june_totals_polars(cache):
+    """
+    Total June volume and mean June rate per vegetable, as a single lazy polars
+    query over the Parquet copy: the filter is pushed into the scan and the
+    string parsing and groupby run multi-threaded in Rust.
+    """
+    def rate(col):
+        return (
+            pl.col(col).str.replace_all(RATE_TOKENS.pattern, '').str.strip_chars()
+            .cast(pl.Float64, strict=False)
+        )
+
+    return (
+        pl.scan_parquet(cache)
+        .filter(
+            (pl.col('rate_date').dt.month() == 6) &
+            pl.col('code_number').is_between(2001, 2999) &
+            pl.col('product_name').is_not_null()
+        )
+        .select(
+            'product_name',
+            pl.col('product_quantity').str.strip_chars().cast(pl.Float64, strict=False).alias('volume'),
+            ((rate('product_max_rate') + rate('product_min_rate')) / 2).alias('avg_rate'),
+        )
+        .group_by('product_name')
+        .agg(pl.col('volume').sum(), pl.col('avg_rate').mean())
+        # pandas' groupby order, so ties in the top-5 resolve the same way
+        .sort('product_name')
+        .collect()
+        .to_pandas()
+    )
+
+
+def june_totals_pandas(path):
+    """Same aggregates as june_totals_polars, for when polars or pyarrow is not installed"""
+    # Only the six used columns, with rate_date decoded to datetimes during the read
+    # (or straight from the Parquet copy when pyarrow is available)
+    df = cached_load(path)
     
-    # Filter for June (any year) and vegetables (code 2001-2999)
+    # Filter for June (any year) and vegetables (code 2001-2999) before any
+    # string parsing, so the rate columns are only cleaned for the June rows
     june_veggies = df[
         (df['rate_date'].dt.month == 6) & 
         (df['code_number'] >= 2001) & 
@@ -39,24 +73,30 @@ def main():
     ].copy()
     
     # Parse rate and volume
-    june_veggies['max_rate'] = june_veggies['product_max_rate'].apply(extract_rate)
-    june_veggies['min_rate'] = june_veggies['product_min_rate'].apply(extract_rate)
+    june_veggies['max_rate'] = parse_rate(june_veggies['product_max_rate'])
+    june_veggies['min_rate'] = parse_rate(june_veggies['product_min_rate'])
     june_veggies['avg_rate'] = (june_veggies['max_rate'] + june_veggies['min_rate']) / 2
-    june_veggies['volume'] = pd.to_numeric(june_veggies['product_quantity'], errors='coerce')
+    june_veggies['volume'] = pd.to_numeric(june_veggies['product_quantity'], errors='coerce').astype('float64')
     
     # Aggregate by vegetable
-    agg_df = june_veggies.groupby('product_name').agg({
+    return june_veggies.groupby('product_name').agg({
         'volume': 'sum',
         'avg_rate': 'mean'
     }).reset_index()
+
+
+def main():
+    cache = parquet_cache('product_all.xlsx') if HAS_POLARS else None
+    agg_df = june_totals_polars(cache) if cache else june_totals_pandas('product_all.xlsx')
     
-    # Normalize and compute combined score (equal weights)
-    agg_df['rate_norm'] = normalize(agg_df['avg_rate'])
-    agg_df['volume_norm'] = normalize(agg_df['volume'])
-    agg_df['combined_score'] = 0.5 * agg_df['rate_norm'] + 0.5 * agg_df['volume_norm']
+    # Normalize and compute combined score (equal weights) on the raw arrays in one
+    # expression, without materializing the normalized columns as Series
+    rate = agg_df['avg_rate'].to_numpy(dtype=np.float64)
+    volume = agg_df['volume'].to_numpy(dtype=np.float64)
+    agg_df['combined_score'] = 0.5 * normalize(rate) + 0.5 * normalize(volume)
     
     # Get top 5
-    top_5 = agg_df.nlargest(5, 'combined_score')
+    top_5 = agg_df.iloc[top_n_positions(agg_df['combined_score'].to_numpy(), 5)]
     
     # Display results
     print("=" * 70)
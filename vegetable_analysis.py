@@ -1,9 +1,13 @@
+import numpy as np
 import pandas as pd
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Protocol
+from typing import Dict, FrozenSet, List, Optional, Protocol, Tuple
 from enum import Enum
 
+from aggregation import top_n_positions
+from data_loader import EXCEL_READER_ENGINE, EXCEL_WRITER_ENGINE, ensure_datetime, parse_rate
+
 
 class RankingCriteria(Enum):
     PRICE = "price"
@@ -11,7 +15,8 @@ class RankingCriteria(Enum):
     PER_ACRE_PRODUCTION = "per_acre_production"
 
 
-@dataclass
+# slots: no per-instance __dict__, so a list of many records stays compact (Python 3.10+)
+@dataclass(slots=True, frozen=True)
 class VegetableData:
     name: str
     marathi_name: str
@@ -20,6 +25,11 @@ class VegetableData:
     per_acre_production: float  # in quintals/acre
 
 
+def month_label(key: int) -> str:
+    """'YYYY-MM' for an int YYYYMM month key"""
+    return f'{key // 100:04d}-{key % 100:02d}'
+
+
 class IDataLoader(Protocol):
     def load(self) -> pd.DataFrame:
         ...
@@ -42,39 +52,62 @@ class IRankingStrategy(ABC):
 
 
 class ExcelDataLoader:
-    def __init__(self, filepath: str):
+    # Text columns read as strings so pandas skips per-cell type inference
+    STRING_COLUMNS = ('product_name', 'product_max_rate', 'product_min_rate')
+    DATE_COLUMNS = ('rate_date',)
+
+    def __init__(self, filepath: str, usecols: Optional[List[str]] = None):
         self._filepath = filepath
+        self._usecols = usecols
 
     def load(self) -> pd.DataFrame:
-        return pd.read_excel(self._filepath)
+        dtype = {c: 'string' for c in self.STRING_COLUMNS if self._wanted(c)}
+        dates = [c for c in self.DATE_COLUMNS if self._wanted(c)]
+        df = pd.read_excel(self._filepath, engine=EXCEL_READER_ENGINE,
+                           usecols=self._usecols, dtype=dtype, parse_dates=dates)
+        for col in dates:
+            df[col] = ensure_datetime(df[col])
+        return df
+
+    def _wanted(self, column: str) -> bool:
+        return self._usecols is None or column in self._usecols
 
 
 class VegetableDataCleaner:
+    INPUT_COLUMNS = ('rate_date', 'product_name', 'product_quantity',
+                     'product_max_rate', 'product_min_rate')
+
     def __init__(self, vegetable_filter: 'IVegetableFilter'):
         self._filter = vegetable_filter
 
     def clean(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        df['product_max_rate'] = df['product_max_rate'].apply(self._parse_price)
-        df['product_min_rate'] = df['product_min_rate'].apply(self._parse_price)
+        # Selecting the used columns gives a new frame to assign into (copy-on-write
+        # shares the data), so the caller's frame is untouched without a full copy
+        df = df[list(self.INPUT_COLUMNS)]
         df['product_quantity'] = pd.to_numeric(df['product_quantity'], errors='coerce')
-        df['avg_price'] = (df['product_max_rate'] + df['product_min_rate']) / 2
-        df['month'] = df['rate_date'].dt.to_period('M')
-        df = df.dropna(subset=['avg_price', 'product_quantity'])
-        df = df[df['product_name'].isin(self._filter.get_vegetable_names())]
+        df['avg_price'] = (parse_rate(df['product_max_rate']) +
+                           parse_rate(df['product_min_rate'])) * 0.5
+        # Undated rows have no month to group under
+        df = df.dropna(subset=['avg_price', 'product_quantity', 'rate_date'])
+        df['month'] = self._month_keys(df['rate_date'])
+        # Only month, product_name, avg_price and product_quantity are used downstream
+        df = df.drop(columns=['product_max_rate', 'product_min_rate', 'rate_date'])
+        names = self._filter.get_vegetable_names()
+        df = df[df['product_name'].isin(names)]
+        # Small integer codes for the groupby key; categories in sorted order so the
+        # grouped output keeps the same (alphabetical) order as plain strings
+        df['product_name'] = pd.Categorical(df['product_name'], categories=sorted(names))
         return df
 
-    def _parse_price(self, val) -> Optional[float]:
-        if pd.isna(val) or val == '&nbsp;':
-            return None
-        try:
-            return float(str(val).replace('Rs.', '').replace('/-', '').replace(',', '').strip())
-        except:
-            return None
+    @staticmethod
+    def _month_keys(dates: pd.Series) -> np.ndarray:
+        """Calendar month of each date as an int32 YYYYMM key, e.g. 202406"""
+        months = dates.to_numpy().astype('datetime64[M]').astype(np.int64)
+        return ((months // 12 + 1970) * 100 + months % 12 + 1).astype(np.int32)
 
 
 class IVegetableFilter(Protocol):
-    def get_vegetable_names(self) -> List[str]:
+    def get_vegetable_names(self) -> FrozenSet[str]:
         ...
 
 
@@ -140,8 +173,11 @@ class MarathiVegetableFilter:
         'डिंग्री': 'Oyster Mushroom',
     }
 
-    def get_vegetable_names(self) -> List[str]:
-        return list(self.VEGETABLES.keys())
+    # Built once; isin/membership checks reuse it instead of a fresh list per call
+    _NAMES: FrozenSet[str] = frozenset(VEGETABLES)
+
+    def get_vegetable_names(self) -> FrozenSet[str]:
+        return self._NAMES
 
     def get_english_name(self, marathi_name: str) -> str:
         return self.VEGETABLES.get(marathi_name, marathi_name)
@@ -235,15 +271,26 @@ class PerAcreProductionRankingStrategy(IRankingStrategy):
         return df.nlargest(n, 'per_acre_production')
 
 
+# Column each criterion ranks on, matching the strategies above
+RANKING_COLUMNS: Dict[RankingCriteria, str] = {
+    RankingCriteria.PRICE: 'avg_price',
+    RankingCriteria.QUANTITY: 'total_quantity',
+    RankingCriteria.PER_ACRE_PRODUCTION: 'per_acre_production',
+}
+
+
+# Strategies are stateless, so one shared instance per criterion
+_STRATEGIES: Dict[RankingCriteria, IRankingStrategy] = {
+    RankingCriteria.PRICE: PriceRankingStrategy(),
+    RankingCriteria.QUANTITY: QuantityRankingStrategy(),
+    RankingCriteria.PER_ACRE_PRODUCTION: PerAcreProductionRankingStrategy(),
+}
+
+
 class RankingStrategyFactory:
     @staticmethod
     def create(criteria: RankingCriteria) -> IRankingStrategy:
-        strategies = {
-            RankingCriteria.PRICE: PriceRankingStrategy(),
-            RankingCriteria.QUANTITY: QuantityRankingStrategy(),
-            RankingCriteria.PER_ACRE_PRODUCTION: PerAcreProductionRankingStrategy(),
-        }
-        return strategies[criteria]
+        return _STRATEGIES[criteria]
 
 
 class VegetableAggregator:
@@ -253,18 +300,20 @@ class VegetableAggregator:
         self._production = production_provider
 
     def aggregate_by_month(self, df: pd.DataFrame) -> pd.DataFrame:
-        aggregated = df.groupby(['month', 'product_name']).agg({
-            'avg_price': 'mean',
-            'product_quantity': 'sum'
-        }).reset_index()
-        
-        aggregated.columns = ['month', 'product_name', 'avg_price', 'total_quantity']
-        
-        aggregated['english_name'] = aggregated['product_name'].apply(
-            self._filter.get_english_name
+        # Groups stay sorted (int month, then category code): the top-5 selection
+        # breaks ties by row position, so this order decides the ranking on ties
+        aggregated = df.groupby(['month', 'product_name'], sort=True, observed=True,
+                                as_index=False).agg(
+            avg_price=('avg_price', 'mean'),
+            total_quantity=('product_quantity', 'sum'),
         )
-        aggregated['per_acre_production'] = aggregated['english_name'].apply(
-            self._production.get_production
+        
+        # Hash lookups straight into the lookup tables rather than a Python call per row;
+        # unknown names fall back to the Marathi name, as get_english_name does
+        marathi = aggregated['product_name'].astype(str)
+        aggregated['english_name'] = marathi.map(self._filter.VEGETABLES).fillna(marathi)
+        aggregated['per_acre_production'] = aggregated['english_name'].map(
+            self._production.PRODUCTION_DATA
         )
         
         return aggregated
@@ -274,18 +323,41 @@ class Top5VegetableAnalyzer:
     def __init__(self, aggregator: VegetableAggregator):
         self._aggregator = aggregator
 
+    def aggregate(self, df: pd.DataFrame) -> pd.DataFrame:
+        return self._aggregator.aggregate_by_month(df)
+
     def get_top5_by_criteria(self, df: pd.DataFrame, 
                              criteria: RankingCriteria) -> Dict[str, pd.DataFrame]:
-        aggregated = self._aggregator.aggregate_by_month(df)
-        strategy = RankingStrategyFactory.create(criteria)
-        
-        results = {}
-        for month in aggregated['month'].unique():
-            month_data = aggregated[aggregated['month'] == month]
-            top5 = strategy.rank(month_data, 5)
-            results[str(month)] = top5
-        
-        return results
+        return self.top5_by_month(self.aggregate(df), criteria)
+
+    def top5_by_month(self, aggregated: pd.DataFrame, criteria: RankingCriteria,
+                      n: int = 5) -> Dict[str, pd.DataFrame]:
+        """
+        Top `n` rows per month of an already aggregated frame, ranked on the
+        criterion's column. Each month is cut with an O(len) partition instead of
+        nlargest; ties still go to the earlier row, as with nlargest(keep='first').
+        """
+        return {
+            month: aggregated.iloc[positions]
+            for month, positions in self.top5_positions(aggregated, criteria, n)
+        }
+
+    def top5_positions(self, aggregated: pd.DataFrame, criteria: RankingCriteria,
+                       n: int = 5) -> List[Tuple[str, np.ndarray]]:
+        """(month label, row positions of its top `n`, best first) per month"""
+        values = aggregated[RANKING_COLUMNS[criteria]].to_numpy(dtype=np.float64)
+        return [
+            (month, rows[top_n_positions(values[rows], n)])
+            for month, rows in self._month_rows(aggregated)
+        ]
+
+    @staticmethod
+    def _month_rows(aggregated: pd.DataFrame) -> List[Tuple[str, np.ndarray]]:
+        """(month label, row positions) per month, in first-seen order, from one stable argsort"""
+        codes, months = pd.factorize(aggregated['month'])
+        order = np.argsort(codes, kind='stable')
+        bounds = np.cumsum(np.bincount(codes, minlength=len(months)))[:-1]
+        return list(zip(map(month_label, months), np.split(order, bounds)))
 
 
 class ReportGenerator:
@@ -293,25 +365,41 @@ class ReportGenerator:
         self._analyzer = analyzer
 
     def generate_full_report(self, df: pd.DataFrame) -> pd.DataFrame:
-        all_results = []
-        
-        for criteria in RankingCriteria:
-            results = self._analyzer.get_top5_by_criteria(df, criteria)
-            
-            for month, top5_df in results.items():
-                for rank, (_, row) in enumerate(top5_df.iterrows(), 1):
-                    all_results.append({
-                        'Month': month,
-                        'Criteria': criteria.value,
-                        'Rank': rank,
-                        'Vegetable (Marathi)': row['product_name'],
-                        'Vegetable (English)': row['english_name'],
-                        'Avg Price (Rs/quintal)': round(row['avg_price'], 2),
-                        'Total Quantity': round(row['total_quantity'], 2),
-                        'Per Acre Production (quintals)': row['per_acre_production']
-                    })
-        
-        return pd.DataFrame(all_results)
+        aggregated = self._analyzer.aggregate(df)
+
+        groups = [
+            (criteria.value, month, positions)
+            for criteria in RankingCriteria
+            for month, positions in self._analyzer.top5_positions(aggregated, criteria)
+        ]
+
+        # Size is known up front: fill typed per-column arrays by slice, then gather
+        # the selected aggregate rows with a single iloc
+        total = sum(len(positions) for _, _, positions in groups)
+        rows = np.empty(total, dtype=np.intp)
+        ranks = np.empty(total, dtype=np.int64)
+        months = np.empty(total, dtype=object)
+        criteria_values = np.empty(total, dtype=object)
+        start = 0
+        for criteria_value, month, positions in groups:
+            end = start + len(positions)
+            rows[start:end] = positions
+            ranks[start:end] = np.arange(1, end - start + 1)
+            months[start:end] = month
+            criteria_values[start:end] = criteria_value
+            start = end
+
+        top = aggregated.iloc[rows]
+        return pd.DataFrame({
+            'Month': months,
+            'Criteria': criteria_values,
+            'Rank': ranks,
+            'Vegetable (Marathi)': top['product_name'].astype(str).to_numpy(),
+            'Vegetable (English)': top['english_name'].to_numpy(),
+            'Avg Price (Rs/quintal)': top['avg_price'].round(2).to_numpy(),
+            'Total Quantity': top['total_quantity'].round(2).to_numpy(),
+            'Per Acre Production (quintals)': top['per_acre_production'].to_numpy(),
+        })
 
 
 class VegetableAnalysisServiceBuilder:
@@ -326,7 +414,8 @@ class VegetableAnalysisServiceBuilder:
         if not self._filepath:
             raise ValueError("Filepath is required")
         
-        loader = ExcelDataLoader(self._filepath)
+        # Only parse the columns the cleaner reads
+        loader = ExcelDataLoader(self._filepath, list(VegetableDataCleaner.INPUT_COLUMNS))
         vegetable_filter = MarathiVegetableFilter()
         cleaner = VegetableDataCleaner(vegetable_filter)
         production_provider = PerAcreProductionProvider()
@@ -363,24 +452,31 @@ def main():
     # Save to Excel
     output_path = '/tmp/inputs/top5_vegetables_report.xlsx'
     
-    with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
+    # xlsxwriter when installed; its constant_memory mode is left off because
+    # pandas does not emit cells in strict row order, which that mode requires
+    with pd.ExcelWriter(output_path, engine=EXCEL_WRITER_ENGINE) as writer:
         # Full report
         report.to_excel(writer, sheet_name='Full Report', index=False)
         
+        # One pass over the report splits it by criteria for both sheet groups
+        by_criteria = dict(list(report.groupby('Criteria', sort=False)))
+        empty = report.iloc[:0]
+        
         # Separate sheets by criteria
         for criteria in RankingCriteria:
-            criteria_data = report[report['Criteria'] == criteria.value]
+            criteria_data = by_criteria.get(criteria.value, empty)
             sheet_name = f'Top5 by {criteria.value}'
             criteria_data.to_excel(writer, sheet_name=sheet_name, index=False)
         
         # Pivot tables for each criteria
         for criteria in RankingCriteria:
-            criteria_data = report[report['Criteria'] == criteria.value]
-            pivot = criteria_data.pivot_table(
+            criteria_data = by_criteria.get(criteria.value, empty)
+            # (Month, Rank) is unique within a criterion, so a plain reshape is
+            # enough; no groupby/aggfunc pass as in pivot_table
+            pivot = criteria_data.pivot(
                 index='Month',
                 columns='Rank',
-                values='Vegetable (English)',
-                aggfunc='first'
+                values='Vegetable (English)'
             )
             pivot.columns = [f'Rank {i}' for i in pivot.columns]
             pivot.to_excel(writer, sheet_name=f'{criteria.value} Pivot')